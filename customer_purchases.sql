@@ -17,6 +17,10 @@ CREATE INDEX idx_product_category ON customer_purchases(product_category);
 -- Create non-clustered index on purchase_date
 CREATE INDEX idx_purchase_date ON customer_purchases(purchase_date);
 
+-- Optional: covering index on product_id for benchmarking (PostgreSQL 11+)
+-- CREATE INDEX IF NOT EXISTS idx_product_id_covering ON customer_purchases(product_id)
+--     INCLUDE (customer_id, customer_name, purchase_date, product_category, amount);
+
 -- Verify all indexes were created
 SELECT 
     indexname, 